@@ -1,7 +1,6 @@
 from flask import Flask
-from .views import app
+from .views import app, dao
 from . import models
 
-models.db.init_app(app)
-#with app.app_context():
-#    models.init_db()
+dao.init_app(app)
+#models.init_db(dao.engines)
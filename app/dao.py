@@ -1,7 +1,59 @@
 from . import models
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, func, insert, inspect, select
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from typing import List
+import itertools
 import pickle
+import random
 
 class Dao:
+    def __init__(self):
+        self.shard_count = 0
+        self.engines = []
+        self.sessions = []
+
+    def init_app(self, app):
+        """
+        Open the shard databases configured for the application.
+
+        Parameters:
+            - app (Flask): The application, whose config defines SHARD_DATABASE_URIS and
+              LEGACY_DATABASE_URI.
+
+        The sessions of a request are released when its application context ends.
+
+        Example:
+            dao.init_app(app)
+        """
+        self.open(app.config['SHARD_DATABASE_URIS'], app.config.get('LEGACY_DATABASE_URI'))
+        app.teardown_appcontext(lambda exception: self.remove_sessions())
+
+    def open(self, shard_uris: List[str], legacy_uri: str = None):
+        """
+        Open one engine and one session per shard database.
+
+        Parameters:
+            - shard_uris (List[str]): The SQLAlchemy URI of each shard database.
+            - legacy_uri (str): The SQLAlchemy URI of the database used before sharding,
+              whose games are copied into the shards when they are created (optional).
+
+        Games are routed to a shard by their ID: the game with ID `id` lives in shard
+        `id % len(shard_uris)`. Each shard has its own engine and thread-local session,
+        so writes to different shards do not wait on the same SQLite write lock.
+
+        Each shard records the number of shards it was created for. A ValueError is
+        raised if it does not match `len(shard_uris)`, since every ID would then be
+        routed to the wrong shard.
+
+        Example:
+            dao.open(['sqlite:///shard_0.db', 'sqlite:///shard_1.db'])
+        """
+        self.shard_count = len(shard_uris)
+        self.engines = [create_engine(uri) for uri in shard_uris]
+        self.sessions = [scoped_session(sessionmaker(bind=engine)) for engine in self.engines]
+        self.__init_shards(legacy_uri)
+
     def get_one_game_by_id(self, id: int):
         """
         Retrieve a single game by its unique identifier.
@@ -10,7 +62,8 @@ class Dao:
             - id (int): The unique identifier of the game.
 
         Returns:
-            models.Game: The Game object corresponding to the specified ID.
+            models.Game: The Game object corresponding to the specified ID, or None if
+            the ID is not a valid game ID.
 
         This method retrieves a single game from the database based on its unique
         identifier (ID). It returns the Game object associated with the given ID.
@@ -18,7 +71,32 @@ class Dao:
         Example:
             game = self.get_one_game_by_id(game_id)
         """
-        return models.db.session.query(models.Game).get(id)
+        try:
+            id = int(id)
+        except ValueError:
+            return None
+        if not -2**63 <= id < 2**63:
+            # Out of the range of SQLite integers, so no game can have this ID
+            return None
+        return self.__get_session(id).get(models.Game, id)
+
+    def get_all_games(self):
+        """
+        Retrieve all games from every shard.
+
+        Returns:
+            List[models.Game]: All Game objects, ordered by start date.
+
+        This method scans all shards in parallel, one thread per shard, and merges the
+        results into a single list ordered by the date the games were started. The
+        returned games are detached from any session.
+
+        Example:
+            games = self.get_all_games()
+        """
+        with ThreadPoolExecutor(max_workers=self.shard_count) as executor:
+            games = executor.map(self.__get_all_games_of_shard, self.engines)
+        return sorted(itertools.chain.from_iterable(games), key=lambda game: game.started_at)
 
     def create_one_game(self, board, game_type: models.GameType):
         """
@@ -32,20 +110,25 @@ class Dao:
             models.Game: The newly created Game object.
 
         This method creates a new game with the specified initial board state and game type.
-        It stores the game in the database and returns the newly created Game object.
+        The shard is chosen at random. The ID of the game is computed by the INSERT statement
+        itself, as the highest ID of the shard plus the number of shards, so that it is
+        unique even when several processes write to the same shard and it keeps encoding
+        the shard. It stores the game in the database and returns the newly created Game object.
 
         Example:
             new_game = self.create_one_game(initial_board, models.GameType.HUMAN_VS_AI)
         """
+        shard = self.__choose_shard()
         game = models.Game(
+            id=select(func.coalesce(func.max(models.Game.id), shard) + self.shard_count).scalar_subquery(),
             active_player=1,
             game_type=game_type.name,
             board=pickle.dumps(board))
-        models.db.session.add(game)
-        models.db.session.commit()
-        models.db.session.flush()
+        session = self.sessions[shard]
+        session.add(game)
+        session.commit()
         return game
-        
+
     def update_one_game(self, id: int, board, active_player: int):
         """
             Update an existing game's board and active player and store the changes in the database.
@@ -68,7 +151,149 @@ class Dao:
         game  = self.get_one_game_by_id(id)
         game.board = pickle.dumps(board)
         game.active_player = active_player
-        models.db.session.commit()
-        models.db.session.flush()
+        self.__get_session(game.id).commit()
         return game
-         
\ No newline at end of file
+
+    def remove_sessions(self):
+        """
+        Release the sessions of the current thread, for every shard.
+
+        This method must be called at the end of each request so that connections are
+        returned to the shard engines.
+
+        Example:
+            dao.remove_sessions()
+        """
+        for session in self.sessions:
+            session.remove()
+
+# ----------------------------------------------------------- PRIVATE METHODS -------------------------------------------------------------------------------
+
+    def __get_session(self, id: int):
+        """
+        Get the session of the shard holding the game with the given ID.
+
+        Parameters:
+            - id (int): The unique identifier of the game.
+
+        Returns:
+            scoped_session: The session bound to the game's shard.
+        """
+        return self.sessions[id % self.shard_count]
+
+    def __choose_shard(self):
+        """
+        Choose the shard in which a new game is stored.
+
+        Returns:
+            int: The index of a shard drawn at random.
+
+        A random draw, rather than using the shards in turn, keeps processes started
+        together from writing to the same shard at the same time.
+        """
+        return random.randrange(self.shard_count)
+
+    def __get_all_games_of_shard(self, engine):
+        """
+        Retrieve all games of one shard, in a session of its own.
+
+        Parameters:
+            - engine (Engine): The engine of the shard.
+
+        Returns:
+            List[models.Game]: The Game objects stored in the shard.
+
+        The session is closed before returning, so that the connection goes back to the
+        pool of the shard even though this method runs in a worker thread.
+        """
+        with Session(engine) as session:
+            return session.query(models.Game).all()
+
+    def __init_shards(self, legacy_uri: str):
+        """
+        Create the tables of the shards and check the number of shards they were created for.
+
+        Parameters:
+            - legacy_uri (str): The SQLAlchemy URI of the database used before sharding (optional).
+
+        Shards that are not initialized yet record the current number of shards and
+        receive the games of the legacy database whose ID routes to them. Each shard is
+        initialized in a single transaction that takes its write lock from the start, so
+        that when several processes start at once they initialize it one after the other.
+        Shards that are already initialized are only read, without taking the write lock.
+        """
+        legacy_games = None
+        for index, engine in enumerate(self.engines):
+            with engine.connect() as connection:
+                shard = self.__get_shard(connection)
+                if shard is None:
+                    connection.exec_driver_sql('BEGIN IMMEDIATE')
+                    models.db.metadata.create_all(connection)
+                    shard = self.__get_shard(connection)
+                if shard is None:
+                    if legacy_games is None:
+                        legacy_games = self.__get_legacy_games(legacy_uri) if legacy_uri else []
+                    self.__create_shard(connection, index, [game for game in legacy_games if game['id'] % self.shard_count == index])
+                else:
+                    self.__check_shard(index, shard)
+                connection.commit()
+
+    def __get_shard(self, connection):
+        """
+        Read the row of the shard table of a shard.
+
+        Parameters:
+            - connection (Connection): The connection to the shard.
+
+        Returns:
+            Row: The ID and the number of shards recorded in the shard, or None if the
+            shard is not initialized.
+        """
+        if not inspect(connection).has_table(models.Shard.__tablename__):
+            return None
+        return connection.execute(select(models.Shard.id, models.Shard.count)).first()
+
+    def __check_shard(self, index: int, shard):
+        """
+        Check that a shard was created at the same position and for the same number of shards.
+
+        Parameters:
+            - index (int): The position of the shard in the shard URIs.
+            - shard (Row): The row of the shard table stored in the shard.
+        """
+        shard_id, shard_count = shard
+        if shard_id != index or shard_count != self.shard_count:
+            raise ValueError(f'Shard {index} was created as shard {shard_id} of {shard_count}, '
+                             f'but {self.shard_count} shards are configured')
+
+    def __create_shard(self, connection, index: int, games):
+        """
+        Record the number of shards in a new shard and copy its legacy games into it.
+
+        Parameters:
+            - connection (Connection): The connection to the shard, in its initialization transaction.
+            - index (int): The position of the shard in the shard URIs.
+            - games (List[dict]): The rows of the legacy games routed to this shard.
+        """
+        connection.execute(insert(models.Shard.__table__), {'id': index, 'count': self.shard_count})
+        if games:
+            connection.execute(insert(models.Game.__table__), games)
+
+    def __get_legacy_games(self, legacy_uri: str):
+        """
+        Read all games of the database used before sharding.
+
+        Parameters:
+            - legacy_uri (str): The SQLAlchemy URI of the legacy database.
+
+        Returns:
+            List[dict]: The rows of the game table, empty if the table does not exist.
+        """
+        engine = create_engine(legacy_uri)
+        try:
+            with engine.connect() as connection:
+                if not inspect(connection).has_table(models.Game.__tablename__):
+                    return []
+                return [dict(row._mapping) for row in connection.execute(select(models.Game.__table__))]
+        finally:
+            engine.dispose()
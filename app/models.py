@@ -6,11 +6,10 @@ from enum import Enum
 from typing import List
 
 db = SQLAlchemy()
-def init_db():
-    db.drop_all()
-    db.create_all()
-    ...
-    db.session.commit()
+def init_db(engines):
+    for engine in engines:
+        Game.__table__.drop(engine, checkfirst=True)
+        db.metadata.create_all(engine)
     lg.warning('Database initialized!')
 
 class Game(db.Model):
@@ -27,6 +26,14 @@ class Game(db.Model):
     def __repr__(self):
         return f'<Game {self.id}>'
 
+class Shard(db.Model):
+    __tablename__ = 'shard'
+    id = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)  # Position du shard dans SHARD_DATABASE_URIS
+    count = db.Column(db.SmallInteger, nullable=False)  # SHARD_COUNT utilisé à la création du shard
+
+    def __repr__(self):
+        return f'<Shard {self.id}/{self.count}>'
+
 class Direction(Enum):
     UP = 'UP'
     DOWN = 'DOWN'
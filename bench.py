@@ -0,0 +1,125 @@
+"""
+Measure how the write throughput of the Dao scales with the number of shards.
+
+By default the benchmark measures the Dao on the local disk as it is, with PRAGMA
+synchronous=FULL. Sharding only helps while writes are bound by the SQLite write lock,
+that is while a commit holds the lock for longer than the CPU time the application
+spends per write and there are enough CPUs to run the writers side by side. When a
+single writer already keeps a CPU busy, as with a fast disk on one CPU, it shows no gain.
+
+--emulate-commit-delay makes each commit hold the write lock for the given extra time,
+to emulate a disk with a slow fsync (about 10 ms on a rotational disk). The gains it
+reports come from that sleep, not from the local disk, and its output is labelled as such.
+
+Usage:
+    python bench.py [--writers 16] [--games 50] [--emulate-commit-delay MS]
+"""
+from app.dao import Dao
+from app.management import GameManagement
+from app.models import GameType
+from multiprocessing import Pool
+from sqlalchemy import event
+import argparse
+import os
+import tempfile
+import time
+
+def write(shard_uris, games: int, commit_delay: float):
+    """
+    Create games and then update them, committing every write.
+
+    Parameters:
+        - shard_uris (List[str]): The SQLAlchemy URI of each shard database.
+        - games (int): The number of games to create.
+        - commit_delay (float): The extra time, in seconds, during which each commit holds the write lock.
+
+    Returns:
+        float: The time spent waiting for the write lock, in seconds.
+
+    Each writer runs in its own process with its own Dao, as an application worker would.
+    """
+    dao = Dao()
+    dao.open(shard_uris)
+    lock_wait = 0
+    starts = {}
+
+    def on_connect(connection, record):
+        connection.execute('PRAGMA synchronous=FULL')
+        # Under contention a writer may wait longer than the default 5 s timeout, which would abort the run
+        connection.execute('PRAGMA busy_timeout=60000')
+
+    def before_execute(connection, cursor, statement, parameters, context, executemany):
+        starts[cursor] = time.perf_counter()
+
+    def after_execute(connection, cursor, statement, parameters, context, executemany):
+        nonlocal lock_wait
+        # INSERT and UPDATE wait in SQLite's busy handler while another connection holds the lock
+        if not statement.startswith('SELECT'):
+            lock_wait += time.perf_counter() - starts.pop(cursor)
+
+    def on_commit(connection):
+        # Emulated fsync time, only with --emulate-commit-delay
+        time.sleep(commit_delay)
+
+    for engine in dao.engines:
+        event.listen(engine, 'connect', on_connect)
+        event.listen(engine, 'before_cursor_execute', before_execute)
+        event.listen(engine, 'after_cursor_execute', after_execute)
+        if commit_delay:
+            event.listen(engine, 'commit', on_commit)
+        # Reconnect so that the pragmas apply to the connection opened by Dao.open
+        engine.dispose()
+    board = GameManagement().new_game(5, GameType.HUMAN_VS_AI)
+    for _ in range(games):
+        game = dao.create_one_game(board, GameType.HUMAN_VS_AI)
+        dao.update_one_game(game.id, board, -1)
+    dao.remove_sessions()
+    return lock_wait
+
+def run(shard_count: int, writers: int, games: int, commit_delay: float):
+    """
+    Measure the write throughput of the Dao for a given number of shards.
+
+    Parameters:
+        - shard_count (int): The number of shard databases.
+        - writers (int): The number of writer processes.
+        - games (int): The number of games created by each writer.
+        - commit_delay (float): The extra time, in seconds, during which each commit holds the write lock.
+
+    Returns:
+        tuple: The number of writes per second and the mean lock wait per write, in seconds.
+    """
+    # The databases are kept next to this file rather than in a tmpfs, so that commits reach a real disk
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(__file__))) as directory:
+        shard_uris = ['sqlite:///' + os.path.join(directory, 'shard_%d.db' % shard) for shard in range(shard_count)]
+        dao = Dao()
+        dao.open(shard_uris)
+        with Pool(writers) as pool:
+            start = time.perf_counter()
+            lock_waits = pool.starmap(write, [(shard_uris, games, commit_delay)] * writers)
+            elapsed = time.perf_counter() - start
+        assert len(dao.get_all_games()) == writers * games
+        for engine in dao.engines:
+            engine.dispose()
+    writes = 2 * writers * games
+    return writes / elapsed, sum(lock_waits) / writes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measure the write throughput of the Dao for 1, 2, 4 and 8 shards.')
+    parser.add_argument('--writers', type=int, default=16, help='number of writer processes')
+    parser.add_argument('--games', type=int, default=50, help='number of games created by each writer')
+    parser.add_argument('--emulate-commit-delay', type=float, default=0, metavar='MS',
+                        help='extra time in ms during which each commit holds the write lock, to emulate a slow disk')
+    args = parser.parse_args()
+    print('%d CPU(s), %d writer processes' % (os.cpu_count(), args.writers))
+    if args.emulate_commit_delay:
+        print('EMULATED slow disk: each commit holds the write lock %g ms more, results do not measure the local disk'
+              % args.emulate_commit_delay)
+    else:
+        print('Local disk, synchronous=FULL')
+    baseline = None
+    for shard_count in (1, 2, 4, 8):
+        writes_per_second, lock_wait = run(shard_count, args.writers, args.games, args.emulate_commit_delay / 1000)
+        baseline = baseline or (writes_per_second, lock_wait)
+        print('%d shard(s): %6.0f writes/s (x%.2f), lock wait %7.2f ms/write (x%.2f)'
+              % (shard_count, writes_per_second, writes_per_second / baseline[0], lock_wait * 1000, lock_wait / baseline[1]))
@@ -1,3 +1,8 @@
 import os
 basedir = os.path.abspath(os.path.dirname(__file__))
-SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'app.db')
\ No newline at end of file
+# Games are spread over SHARD_COUNT databases, routed by game id (see app/dao.py).
+# Changing SHARD_COUNT requires new shard databases: existing shards refuse to open.
+SHARD_COUNT = 4
+SHARD_DATABASE_URIS = ['sqlite:///' + os.path.join(basedir, 'app_shard_%d.db' % shard) for shard in range(SHARD_COUNT)]
+# Database used before sharding, its games are copied into the shards when they are created
+LEGACY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'app.db')
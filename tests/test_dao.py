@@ -0,0 +1,36 @@
+from app import models
+from app.dao import Dao
+from multiprocessing import Pool
+from sqlalchemy import create_engine, insert
+import os
+import pickle
+
+def open_dao(shard_uris, legacy_uri):
+    Dao().open(shard_uris, legacy_uri)
+
+def create_legacy_db(path, ids):
+    engine = create_engine('sqlite:///' + path)
+    models.Game.__table__.create(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(models.Game.__table__), [
+            {'id': id, 'active_player': 1, 'game_type': 'HUMAN_VS_AI', 'board': pickle.dumps([[2, 0], [0, -2]])}
+            for id in ids])
+    engine.dispose()
+    return 'sqlite:///' + path
+
+def test_processes_opening_new_shards_at_once(tmp_path):
+    shard_uris = ['sqlite:///' + os.path.join(tmp_path, 'shard_%d.db' % shard) for shard in range(4)]
+    legacy_uri = create_legacy_db(os.path.join(tmp_path, 'legacy.db'), range(1, 12))
+    with Pool(8) as pool:
+        pool.starmap(open_dao, [(shard_uris, legacy_uri)] * 8)
+    dao = Dao()
+    dao.open(shard_uris)
+    assert sorted(game.id for game in dao.get_all_games()) == list(range(1, 12))
+    assert dao.get_one_game_by_id(11).game_type == 'HUMAN_VS_AI'
+
+def test_get_one_game_by_invalid_id(tmp_path):
+    dao = Dao()
+    dao.open(['sqlite:///' + os.path.join(tmp_path, 'shard_%d.db' % shard) for shard in range(2)])
+    assert dao.get_one_game_by_id('abc') is None
+    assert dao.get_one_game_by_id('99999999999999999999999') is None
+    assert dao.get_one_game_by_id(-2**63 - 1) is None